@@ -33,6 +33,14 @@ class CleaningRobot:
     PWMB = 32
     STBY = 33
 
+    MOTOR_PULSE = 1  # seconds of a full-duty wheel or rotation pulse; a wheel pulse moves the robot one cell
+
+    # Smooth motion: the wheel motor is driven by PWM on PWMA and kept running across consecutive cells
+    PWM_FREQUENCY = 1000  # Hz
+    RAMP_STEPS = 5  # duty cycle increments to reach or leave full speed
+    RAMP_STEP_TIME = 0.05  # seconds per ramp increment
+    CELL_TIME = MOTOR_PULSE  # seconds to cross a cell at full duty, as a wheel pulse does
+
     N = 'N'
     S = 'S'
     E = 'E'
@@ -61,6 +69,15 @@ class CleaningRobot:
         "W": "N"
     }
 
+    # Motion kernel: the heading is stored as an index into HEADINGS and
+    # turns/moves are plain tuple lookups instead of string-keyed dicts
+    HEADINGS = (N, E, S, W)
+    HEADING_INDEX = {N: 0, E: 1, S: 2, W: 3}
+    TURN_LEFT = (3, 0, 1, 2)
+    TURN_RIGHT = (1, 2, 3, 0)
+    DELTAS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+    STATUS_SUFFIXES = (",N)", ",E)", ",S)", ",W)")  # heading and closing bracket of robot_status()
+
     def __init__(self):
         GPIO.setmode(GPIO.BOARD)
         GPIO.setwarnings(False)
@@ -84,28 +101,44 @@ class CleaningRobot:
 
         self.pos_x = 0
         self.pos_y = 0
-        self.heading = "N"
+        self.heading_index = 0
 
         self.recharge_led_on = False
         self.cleaning_system_on = False
         self.cleaned_positions = list()
+        self.obstacle_positions = set()
+        self.map_journal = None  # Optional MapJournal recording map changes for the RMS
         self.room_length = 3
         self.room_width = 3
+        self.room_cells = None  # Set of the known free cells when the room has been explored, obstacles excluded
         self.water_level = 0
         self.dirty_sensor = 0
 
+        self.smooth_motion = False
+        self.wheel_pwm = None
+
 
     def initialize_robot(self) -> None:
         self.pos_x = 0
         self.pos_y = 0
-        self.heading = self.N
+        self.heading_index = 0
         self.cleaned_positions = {(0, 0)}
         if self.robot_status() != "(0,0,N)":
             raise CleaningRobotError("error in initialize robot")
 
 
+    @property
+    def heading(self) -> str:
+        return self.HEADINGS[self.heading_index]
+
+    @heading.setter
+    def heading(self, value: str) -> None:
+        if value not in self.HEADING_INDEX:
+            raise CleaningRobotError(f"invalid heading {value!r}")
+        self.heading_index = self.HEADING_INDEX[value]
+
     def robot_status(self) -> str:
-        return f"({self.pos_x},{self.pos_y},{self.heading})"
+        return f"({self.pos_x},{self.pos_y}{self.STATUS_SUFFIXES[self.heading_index]}"
 
     def execute_command(self, command: str) -> str:
         self.manage_cleaning_system()
@@ -113,35 +146,122 @@ class CleaningRobot:
             return "!" + self.robot_status()
 
         if command == self.FORWARD:
-            self.cleaning_map()
+            self.mark_cleaned()
             return self.move_forward(command)
 
         elif command == self.LEFT:
             self.activate_rotation_motor(self.LEFT)
-            self.heading = self.ROTATIONS_LEFT[self.heading]
+            self.heading_index = self.TURN_LEFT[self.heading_index]
 
         elif command == self.RIGHT:
             self.activate_rotation_motor(self.RIGHT)
-            self.heading = self.ROTATIONS_RIGHT[self.heading]
+            self.heading_index = self.TURN_RIGHT[self.heading_index]
 
 
         else:
             raise ValueError("Invalid command")
-        self.cleaning_map()
+        self.mark_cleaned()
         return self.robot_status()
 
     def move_forward(self,commabd:str) -> str:
+        dx, dy = self.DELTAS[self.heading_index]
         if self.obstacle_found():
-            self.pos_y = int(self.pos_y)
-            return f"({self.pos_x},{self.pos_y},{self.heading})({self.pos_x},{self.pos_y + 1})"
+            return self.obstacle_reply(dx, dy)
 
         else:
             self.activate_wheel_motor()
-            dx, dy = self.DIRECTIONS[self.heading]
-            self.pos_x += dx
-            self.pos_y += dy
+            self.advance(dx, dy)
             return self.robot_status()
 
+    def advance(self, dx: int, dy: int) -> None:
+        """
+        Update the position when the robot enters the next cell
+        """
+        self.pos_x += dx
+        self.pos_y += dy
+
+    def obstacle_reply(self, dx: int, dy: int) -> str:
+        """
+        Record the cell in front of the robot as an obstacle and build the reply for the RMS.
+        The reply keeps the RMS protocol, which reports the cell at (x,y+1) whatever the heading;
+        the obstacle map and the map journal get the cell the robot actually faces.
+        :return: the robot status followed by the reported cell, e.g. "(1,1,E)(1,2)"
+        """
+        cell = (self.pos_x + dx, self.pos_y + dy)
+        if self.map_journal is not None and cell not in self.obstacle_positions:
+            self.map_journal.obstacle(*cell)
+        self.obstacle_positions.add(cell)
+        return f"{self.robot_status()}({self.pos_x},{self.pos_y + 1})"
+
+    def execute_commands(self, commands: str) -> list:
+        """
+        Execute a sequence of commands and return one reply per command.
+        With smooth_motion enabled, consecutive "f" commands are merged into a
+        single PWM run so the wheel motor does not stop at every cell.
+        """
+        if not self.smooth_motion:
+            return [self.execute_command(command) for command in commands]
+        replies = []
+        i = 0
+        while i < len(commands):
+            if commands[i] != self.FORWARD:
+                replies.append(self.execute_command(commands[i]))
+                i += 1
+                continue
+            run = i
+            while run < len(commands) and commands[run] == self.FORWARD:
+                run += 1
+            replies.extend(self.forward_run(run - i))
+            i = run
+        return replies
+
+    def forward_run(self, cells: int) -> list:
+        """
+        Move forward up to a given number of cells in one continuous run.
+        Battery and obstacles are checked before every cell, as with execute_command.
+        The cell ahead is checked as soon as the robot enters a cell, so that when
+        it is blocked the ramp-down ends inside the cell the robot is crossing.
+        :return: one reply per requested cell
+        """
+        replies = []
+        running = False
+        ahead_free = False  # the cell ahead was found free while crossing the previous cell
+        try:
+            for i in range(cells):
+                self.manage_cleaning_system()
+                if self.recharge_led_on:
+                    if running:
+                        self.stop_wheel_run(ramp=False)
+                        running = False
+                    replies.append("!" + self.robot_status())
+                    continue
+                self.mark_cleaned()
+                dx, dy = self.DELTAS[self.heading_index]
+                if not ahead_free and self.obstacle_found():
+                    replies.append(self.obstacle_reply(dx, dy))
+                    continue
+                ramp_up = not running
+                if ramp_up:
+                    self.start_wheel_run()
+                    running = True
+                self.advance(dx, dy)
+                ahead_free = i < cells - 1 and not self.obstacle_found()
+                # Distance covered by the ramps, in seconds at full duty
+                duration = self.CELL_TIME
+                if ramp_up:
+                    duration -= self.RAMP_STEP_TIME * (self.RAMP_STEPS + 1) / 2
+                if not ahead_free:
+                    duration -= self.RAMP_STEP_TIME * (self.RAMP_STEPS - 1) / 2
+                self.drive_cell(duration)
+                if not ahead_free:
+                    self.stop_wheel_run()
+                    running = False
+                replies.append(self.robot_status())
+        finally:
+            if running:
+                self.stop_wheel_run(ramp=False)
+        return replies
+
     def obstacle_found(self) -> bool:
         return GPIO.input(self.INFRARED_PIN)
 
@@ -150,10 +270,14 @@ class CleaningRobot:
         if charge_left < 0 or charge_left > 100:
             raise CleaningRobotError("charge value must be between 0 and 100")
         if charge_left > 10:
+            if self.cleaning_system_on and not self.recharge_led_on:
+                return  # Pins are already driven in this state
             GPIO.output(self.RECHARGE_LED_PIN, False)
             GPIO.output(self.CLEANING_SYSTEM_PIN, True)
             self.cleaning_system_on = True
             self.recharge_led_on = False
+        elif self.recharge_led_on and not self.cleaning_system_on:
+            return
         else:
             GPIO.output(self.RECHARGE_LED_PIN, True)
             GPIO.output(self.CLEANING_SYSTEM_PIN, False)
@@ -173,7 +297,7 @@ class CleaningRobot:
         GPIO.output(self.STBY, GPIO.HIGH)
 
         if DEPLOYMENT: # Sleep only if you are deploying on the actual hardware
-            time.sleep(1) # Wait for the motor to actually move
+            time.sleep(self.MOTOR_PULSE) # Wait for the motor to actually move
 
         # Stop the motor
         GPIO.output(self.AIN1, GPIO.LOW)
@@ -181,6 +305,46 @@ class CleaningRobot:
         GPIO.output(self.PWMA, GPIO.LOW)
         GPIO.output(self.STBY, GPIO.LOW)
 
+    def start_wheel_run(self) -> None:
+        """
+        Start the wheel motor clockwise and ramp its PWM duty cycle up to full speed
+        """
+        if self.wheel_pwm is None:
+            self.wheel_pwm = GPIO.PWM(self.PWMA, self.PWM_FREQUENCY)
+        GPIO.output(self.AIN1, GPIO.HIGH)
+        GPIO.output(self.AIN2, GPIO.LOW)
+        GPIO.output(self.STBY, GPIO.HIGH)
+        self.wheel_pwm.start(0)
+        for step in range(1, self.RAMP_STEPS + 1):
+            self.wheel_pwm.ChangeDutyCycle(100 * step / self.RAMP_STEPS)
+            if DEPLOYMENT:
+                time.sleep(self.RAMP_STEP_TIME)
+
+    def drive_cell(self, duration: float) -> None:
+        """
+        Keep the wheel motor running at full speed while crossing a cell
+        :param duration: seconds at full speed, the cell time less the distance covered by the ramps
+        """
+        if DEPLOYMENT:
+            time.sleep(duration)
+
+    def stop_wheel_run(self, ramp: bool = True) -> None:
+        """
+        Ramp the wheel motor PWM duty cycle down and stop the motor
+        :param ramp: False to cut the motor at once, e.g. when the battery runs low
+        """
+        if ramp:
+            for step in range(self.RAMP_STEPS - 1, -1, -1):
+                self.wheel_pwm.ChangeDutyCycle(100 * step / self.RAMP_STEPS)
+                if DEPLOYMENT:
+                    time.sleep(self.RAMP_STEP_TIME)
+        else:
+            self.wheel_pwm.ChangeDutyCycle(0)
+        self.wheel_pwm.stop()
+        GPIO.output(self.AIN1, GPIO.LOW)
+        GPIO.output(self.AIN2, GPIO.LOW)
+        GPIO.output(self.STBY, GPIO.LOW)
+
     def activate_rotation_motor(self, direction) -> None:
         """
         Let the robot rotate towards a given direction
@@ -198,7 +362,7 @@ class CleaningRobot:
         GPIO.output(self.STBY, GPIO.HIGH)
 
         if DEPLOYMENT:  # Sleep only if you are deploying on the actual hardware
-            time.sleep(1)  # Wait for the motor to actually move
+            time.sleep(self.MOTOR_PULSE)  # Wait for the motor to actually move
 
         # Stop the motor
         GPIO.output(self.BIN1, GPIO.LOW)
@@ -212,12 +376,33 @@ class CleaningRobot:
             return 0
         return charge_left
 
+    def mark_cleaned(self) -> None:
+        """
+        Record the current cell as cleaned without computing the cleaned percentage
+        """
+        cell = (self.pos_x, self.pos_y)
+        if self.map_journal is not None and cell not in self.cleaned_positions:
+            self.map_journal.cleaned(*cell)
+        self.cleaned_positions.add(cell)
+
     def cleaning_map(self) -> float:
-        self.cleaned_positions.add((self.pos_x, self.pos_y))
-        total_positions = self.room_length * self.room_width
+        self.mark_cleaned()
+        return self.cleaned_percentage()
+
+    def cleaned_percentage(self) -> float:
+        """
+        Cleaned percentage of the room, without marking the current cell as cleaned
+        """
+        if self.room_cells is not None:
+            # A cleaned cell may since have been found blocked, only the known free cells count
+            total_positions = len(self.room_cells)
+            cleaned = sum(1 for cell in self.cleaned_positions if cell in self.room_cells)
+        else:
+            total_positions = self.room_length * self.room_width
+            cleaned = len(self.cleaned_positions)
         if total_positions == 0:
             raise CleaningRobotError()
-        return (len(self.cleaned_positions) / total_positions) * 100
+        return (cleaned / total_positions) * 100
 
 
     def check_water_status(self) -> int:
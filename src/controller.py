@@ -0,0 +1,129 @@
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import NamedTuple
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+
+
+class RobotSnapshot(NamedTuple):
+    """
+    Immutable view of the robot state published after every command
+    """
+    pos_x: int
+    pos_y: int
+    heading: str
+    recharge_led_on: bool
+    cleaning_system_on: bool
+    cleaned_cells: int
+
+    def status(self) -> str:
+        return f"({self.pos_x},{self.pos_y},{self.heading})"
+
+
+class RobotController:
+    """
+    Serialises every access to a CleaningRobot through a bounded command queue
+    consumed by a single actuator thread. Other threads (RMS listener, battery
+    monitor, telemetry) read immutable snapshots, so they never wait behind a
+    motor pulse.
+    """
+
+    def __init__(self, robot: CleaningRobot, max_pending: int = 16):
+        if max_pending <= 0:
+            raise CleaningRobotError("max_pending must be positive")
+        self.robot = robot
+        self.max_pending = max_pending
+        # The condition guards _pending and _stopped so that a stop() can never
+        # slip between the stopped check and the enqueue of call()
+        self._condition = threading.Condition()
+        self._pending = deque()
+        self._stopped = False
+        self._snapshot = self._take_snapshot()
+        self._worker = threading.Thread(target=self._run, name="robot-actuator", daemon=True)
+        self._worker.start()
+
+    def _take_snapshot(self) -> RobotSnapshot:
+        robot = self.robot
+        return RobotSnapshot(robot.pos_x, robot.pos_y, robot.heading, robot.recharge_led_on,
+                             robot.cleaning_system_on, len(robot.cleaned_positions))
+
+    def _run(self) -> None:
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._pending or self._stopped)
+                    if not self._pending:
+                        return
+                    function, args, future = self._pending.popleft()
+                    # Wake up callers waiting for room in the queue
+                    self._condition.notify_all()
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(function(*args))
+                    except Exception as error:
+                        future.set_exception(error)
+                # Publishing is a single reference assignment, readers never see a partial state
+                self._snapshot = self._take_snapshot()
+        finally:
+            # If the worker dies, stop accepting commands that would never run
+            with self._condition:
+                self._stopped = True
+                self._condition.notify_all()
+            self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        with self._condition:
+            leftover = list(self._pending)
+            self._pending.clear()
+            self._condition.notify_all()
+        for _, _, future in leftover:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(CleaningRobotError("controller stopped before the command was executed"))
+
+    def call(self, function, *args, timeout: float = None) -> Future:
+        """
+        Run function(*args) on the actuator thread
+        :param timeout: seconds to wait for room in the queue, None to wait forever
+        :return: a Future holding the result of the function
+        """
+        future = Future()
+        with self._condition:
+            has_room = self._condition.wait_for(
+                lambda: self._stopped or len(self._pending) < self.max_pending, timeout)
+            if self._stopped:
+                raise CleaningRobotError("controller is stopped")
+            if not has_room:
+                raise CleaningRobotError("command queue is full")
+            self._pending.append((function, args, future))
+            self._condition.notify_all()
+        return future
+
+    def submit(self, command: str, timeout: float = None) -> Future:
+        """
+        Queue an RMS command
+        :return: a Future holding the reply of execute_command
+        """
+        if command not in (CleaningRobot.FORWARD, CleaningRobot.LEFT, CleaningRobot.RIGHT):
+            raise ValueError("Invalid command")
+        return self.call(self.robot.execute_command, command, timeout=timeout)
+
+    def snapshot(self) -> RobotSnapshot:
+        return self._snapshot
+
+    def robot_status(self) -> str:
+        return self._snapshot.status()
+
+    def stop(self, timeout: float = None, cancel_pending: bool = False) -> None:
+        """
+        Stop accepting commands and wait for the worker to finish
+        :param timeout: seconds to wait for the worker, None to wait forever
+        :param cancel_pending: fail the queued commands with CleaningRobotError
+            instead of executing them
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if cancel_pending:
+            self._fail_pending()
+        self._worker.join(timeout)
@@ -0,0 +1,248 @@
+from collections import deque
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.route_cache import RouteCache, plan_route, distance, layout_fingerprint
+
+
+class Explorer:
+    """
+    Frontier-based exploration of a room of unknown size.
+    The robot probes unknown cells with its infrared sensor by trying to move
+    into them, so the room is mapped and cleaned in the same pass.
+    """
+
+    PATH_RETRIES = 3  # times to plan again when every path crosses a temporarily blocked free cell
+
+    def __init__(self, robot: CleaningRobot, route_cache: RouteCache = None, layout=None):
+        """
+        :param route_cache: optional cache reused for the cleaning plan and the routes back to the start cell
+        :param layout: (free cells, blocked cells) of the room known from a previous session, e.g. the
+            free and blocked sets of the last explorer; the cached cleaning plan is only replayed if
+            it was stored for this layout and the same start pose
+        """
+        self.robot = robot
+        self.route_cache = route_cache
+        self.layout = None if layout is None else layout_fingerprint(*layout)
+        start = (robot.pos_x, robot.pos_y)
+        self.start = start
+        self.start_pose = (robot.pos_x, robot.pos_y, robot.heading)
+        self.trail = [start]  # cells visited or probed in order, stored as the cleaning plan
+        self.free = {start}
+        # Obstacles known from earlier sessions may have been removed, so every cell is probed again
+        self.blocked = set()
+        # Unknown cells adjacent to at least one known free cell
+        self.frontier = set()
+        # Known free cells found blocked while crossing them, e.g. by another robot;
+        # they are avoided until the next frontier cell is reached
+        self.avoid = set()
+        self._add_free(start)
+        robot.room_cells = self.free
+        self.commands = 0
+
+    def _add_free(self, cell) -> None:
+        self.free.add(cell)
+        self.robot.obstacle_positions.discard(cell)
+        self.frontier.discard(cell)
+        x, y = cell
+        for dx, dy in CleaningRobot.DELTAS:
+            neighbour = (x + dx, y + dy)
+            if neighbour not in self.free and neighbour not in self.blocked:
+                self.frontier.add(neighbour)
+
+    def _add_blocked(self, cell) -> None:
+        self.blocked.add(cell)
+        self.frontier.discard(cell)
+        self.free.discard(cell)
+        if self.route_cache is not None:
+            self.route_cache.obstacle_added(cell)
+
+    def _avoid(self, cell) -> None:
+        """
+        Avoid a known free cell that was found blocked while crossing it. The
+        robot reported it as an obstacle, which is undone in its map since the
+        cell is free and already cleaned.
+        """
+        self.avoid.add(cell)
+        robot = self.robot
+        if cell in robot.obstacle_positions:
+            robot.obstacle_positions.discard(cell)
+            if robot.map_journal is not None:
+                robot.map_journal.cleaned(*cell)
+
+    def nearest_frontier(self):
+        """
+        Breadth-first search over the known free cells that stops at the first
+        cell bordering the frontier, so its cost depends on the distance to the
+        nearest frontier and not on the size of the map
+        :return: (path of free cells from the robot, frontier cell) or None
+        """
+        start = (self.robot.pos_x, self.robot.pos_y)
+        parents = {start: None}
+        queue = deque([start])
+        frontier = self.frontier
+        while queue:
+            cell = queue.popleft()
+            x, y = cell
+            for dx, dy in CleaningRobot.DELTAS:
+                neighbour = (x + dx, y + dy)
+                if neighbour in frontier:
+                    path = []
+                    while cell is not None:
+                        path.append(cell)
+                        cell = parents[cell]
+                    path.reverse()
+                    return path, neighbour
+                if neighbour in self.free and neighbour not in parents and neighbour not in self.avoid:
+                    parents[neighbour] = cell
+                    queue.append(neighbour)
+        return None
+
+    def _command(self, command: str) -> str:
+        self.commands += 1
+        reply = self.robot.execute_command(command)
+        if reply.startswith("!"):
+            raise CleaningRobotError("battery too low to keep exploring")
+        return reply
+
+    def _step_to(self, cell) -> bool:
+        """
+        Turn towards an adjacent cell and try to move into it
+        :return: True if the robot moved, False if the cell is blocked
+        """
+        robot = self.robot
+        heading = CleaningRobot.DELTAS.index((cell[0] - robot.pos_x, cell[1] - robot.pos_y))
+        turns = (heading - robot.heading_index) % 4
+        if turns == 3:
+            self._command(CleaningRobot.LEFT)
+        else:
+            for _ in range(turns):
+                self._command(CleaningRobot.RIGHT)
+        self._command(CleaningRobot.FORWARD)
+        if (robot.pos_x, robot.pos_y) != cell:
+            return False
+        self.trail.append(cell)
+        return True
+
+    def explore(self, max_commands: int = None) -> float:
+        """
+        Visit frontier cells, nearest first, until the room is fully mapped
+        :param max_commands: optional budget of commands to send to the robot
+        :return: the cleaned percentage of the known free cells
+        """
+        self._replay_plan(max_commands)
+        retries = 0
+        while self.frontier:
+            if max_commands is not None and self.commands >= max_commands:
+                break
+            found = self.nearest_frontier()
+            if found is None:
+                if not self.avoid or retries == self.PATH_RETRIES:
+                    break
+                retries += 1
+                self.avoid.clear()
+                continue
+            path, target = found
+            for cell in path[1:]:
+                if not self._step_to(cell):
+                    # Something stands on a known free cell: plan around it instead of mapping it as an obstacle
+                    self._avoid(cell)
+                    break
+            else:
+                if self._step_to(target):
+                    self._add_free(target)
+                else:
+                    # The failed probe is part of the plan so that a replay probes the cell again
+                    self.trail.append(target)
+                    self._add_blocked(target)
+                self.avoid.clear()
+                retries = 0
+        self._update_room_size()
+        self.robot.cleaning_map()
+        if self.route_cache is not None and not self.frontier:
+            self.route_cache.put_plan(layout_fingerprint(self.free, self.blocked), self.start_pose, self.trail,
+                                      self.blocked)
+        return self.coverage()
+
+    def _replay_plan(self, max_commands: int = None) -> None:
+        """
+        Follow the cleaning plan cached by a previous session, if any, instead
+        of searching the frontier cell by cell. The plan also holds the probes
+        of the cells found blocked; they are only hints and are probed again,
+        so a removed obstacle is found and cleaned. If a free cell of the plan
+        is blocked the plan is dropped and exploration carries on from the frontier.
+        """
+        if self.route_cache is None or self.layout is None:
+            return
+        if (self.robot.pos_x, self.robot.pos_y, self.robot.heading) != self.start_pose:
+            return
+        plan = self.route_cache.get_plan(self.layout, self.start_pose)
+        if plan is None:
+            return
+        route, hints = plan
+        for cell in route[1:]:
+            if max_commands is not None and self.commands >= max_commands:
+                return
+            position = (self.robot.pos_x, self.robot.pos_y)
+            if distance(cell, position) != 1:
+                return
+            if cell in self.blocked:
+                continue
+            if self._step_to(cell):
+                self._add_free(cell)
+                if cell in hints:
+                    # The obstacle has been removed since the plan was stored, go back to the plan
+                    self.route_cache.obstacle_removed(cell)
+                    if not self._step_to(position):
+                        return
+                continue
+            self._add_blocked(cell)
+            if cell not in hints:
+                return
+            self.trail.append(cell)
+
+    def return_home(self) -> bool:
+        """
+        Drive back to the start cell through the known free cells, reusing the
+        cached route when there is one
+        :return: True if the robot reached the start cell
+        """
+        retries = 0
+        while True:
+            position = (self.robot.pos_x, self.robot.pos_y)
+            free = self.free - self.avoid if self.avoid else self.free
+            if self.route_cache is not None:
+                layout = layout_fingerprint(self.free, self.blocked)
+                route = self.route_cache.route(layout, free, position, self.start)
+            else:
+                route = plan_route(free, position, self.start)
+            if route is None:
+                if not self.avoid or retries == self.PATH_RETRIES:
+                    return False
+                retries += 1
+                self.avoid.clear()
+                continue
+            for cell in route[1:]:
+                if not self._step_to(cell):
+                    # The cached route is not reused while the cell is avoided, plan again around it
+                    self._avoid(cell)
+                    break
+            else:
+                self.avoid.clear()
+                return True
+
+    def bounds(self):
+        """
+        :return: (min_x, min_y, max_x, max_y) of the known free cells
+        """
+        xs = [x for x, _ in self.free]
+        ys = [y for _, y in self.free]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _update_room_size(self) -> None:
+        min_x, min_y, max_x, max_y = self.bounds()
+        self.robot.room_width = max_x - min_x + 1
+        self.robot.room_length = max_y - min_y + 1
+
+    def coverage(self) -> float:
+        cleaned = sum(1 for cell in self.robot.cleaned_positions if cell in self.free)
+        return cleaned / len(self.free) * 100
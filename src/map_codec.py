@@ -0,0 +1,290 @@
+from collections import deque
+from itertools import islice
+
+from src.cleaning_robot import CleaningRobotError
+
+# Wire format shared with the RMS.
+# Header: MAGIC, VERSION, kind, then varints.
+#   SNAPSHOT: seq, min_x, min_y, width, height, followed by row-major runs
+#             encoded as varint(length << 2 | state)
+#   DELTA:    since, seq, count, followed by cells encoded relative to the
+#             previous one as varint(zigzag(dx) << 2 | state), varint(zigzag(dy))
+MAGIC = b"CRM"
+VERSION = 1
+SNAPSHOT = 0
+DELTA = 1
+
+EMPTY = 0
+CLEANED = 1
+OBSTACLE = 2
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def encode_cells(cells, min_x: int, min_y: int, width: int, height: int, seq: int = 0):
+    """
+    Encode a run-length snapshot from cells given in row-major order.
+    This is fully streaming: each (x, y, state) is consumed as it arrives and
+    a chunk is yielded at the end of every row, so the input can itself be a
+    generator (for example a MapReader being re-encoded).
+    :param cells: iterable of (x, y, state) sorted by y then x, inside the given bounds
+    :return: a generator of bytes chunks
+    """
+    yield (MAGIC + bytes((VERSION, SNAPSHOT)) + _varint(seq) + _varint(_zigzag(min_x))
+           + _varint(_zigzag(min_y)) + _varint(width) + _varint(height))
+
+    chunk = bytearray()
+    state, length = EMPTY, 0
+    index = 0  # next cell of the flattened grid to encode
+    row = min_y
+    for x, y, cell_state in cells:
+        if not (min_x <= x < min_x + width and min_y <= y < min_y + height):
+            raise CleaningRobotError(f"cell ({x},{y}) outside the map bounds")
+        cell_index = (y - min_y) * width + (x - min_x)
+        if cell_index < index:
+            raise CleaningRobotError("cells must be unique and in row-major order")
+        if y != row:
+            row = y
+            if chunk:
+                yield bytes(chunk)
+                chunk = bytearray()
+        if cell_index > index:
+            # Empty gap before the marked cell
+            if state != EMPTY:
+                chunk += _varint(length << 2 | state)
+                state, length = EMPTY, 0
+            length += cell_index - index
+        if cell_state != state:
+            if length:
+                chunk += _varint(length << 2 | state)
+            state, length = cell_state, 0
+        length += 1
+        index = cell_index + 1
+
+    total = width * height
+    if total > index:
+        if state != EMPTY:
+            chunk += _varint(length << 2 | state)
+            state, length = EMPTY, 0
+        length += total - index
+    if length:
+        # The last run is always written, trailing empty cells included, so the
+        # decoder can tell a complete snapshot from a truncated one
+        chunk += _varint(length << 2 | state)
+    if chunk:
+        yield bytes(chunk)
+
+
+def encode_map(cleaned, obstacles, seq: int = 0):
+    """
+    Encode the coverage and obstacle sets as a run-length snapshot.
+    The sets are unordered, so their cells are sorted into one temporary list
+    of keys before streaming them through encode_cells(); the dense grid is
+    never built. Callers that can produce the cells in row-major order should
+    use encode_cells() directly to avoid this copy.
+    :return: a generator of bytes chunks
+    """
+    min_x = min_y = max_x = max_y = None
+    for cells in (cleaned, obstacles):
+        for x, y in cells:
+            if min_x is None:
+                min_x = max_x = x
+                min_y = max_y = y
+                continue
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+    if min_x is None:
+        return encode_cells((), 0, 0, 0, 0, seq)
+
+    # An obstacle wins over a cleaned cell at the same position
+    keys = [(y, x, OBSTACLE) for x, y in obstacles]
+    keys += [(y, x, CLEANED) for x, y in cleaned if (x, y) not in obstacles]
+    keys.sort()
+    return encode_cells(((x, y, state) for y, x, state in keys), min_x, min_y,
+                        max_x - min_x + 1, max_y - min_y + 1, seq)
+
+
+class MapReader:
+    """
+    Streaming decoder for snapshots and deltas: the header is parsed on
+    construction and iterating yields (x, y, state) for every encoded cell,
+    reading the chunks only as far as needed
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self._pos = 0
+        if self._read(len(MAGIC)) != MAGIC:
+            raise CleaningRobotError("not a map stream")
+        version, self.kind = self._read(2)
+        if version != VERSION:
+            raise CleaningRobotError(f"unsupported map version {version}")
+        if self.kind == SNAPSHOT:
+            self.since = None
+            self.seq = self._read_varint()
+            self.min_x = _unzigzag(self._read_varint())
+            self.min_y = _unzigzag(self._read_varint())
+            self.width = self._read_varint()
+            self.height = self._read_varint()
+        elif self.kind == DELTA:
+            self.since = self._read_varint()
+            self.seq = self._read_varint()
+            self.count = self._read_varint()
+        else:
+            raise CleaningRobotError(f"unknown map stream kind {self.kind}")
+
+    def _fill(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer = self._buffer[self._pos:] + chunk
+                self._pos = 0
+                return True
+        return False
+
+    def _read(self, size: int) -> bytes:
+        while len(self._buffer) - self._pos < size:
+            if not self._fill():
+                raise CleaningRobotError("truncated map stream")
+        data = self._buffer[self._pos:self._pos + size]
+        self._pos += size
+        return data
+
+    def _read_varint(self) -> int:
+        value, shift = 0, 0
+        while True:
+            if self._pos >= len(self._buffer) and not self._fill():
+                raise CleaningRobotError("truncated map stream")
+            byte = self._buffer[self._pos]
+            self._pos += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def __iter__(self):
+        if self.kind == SNAPSHOT:
+            return self._snapshot_cells()
+        return self._delta_cells()
+
+    def _snapshot_cells(self):
+        width = self.width
+        index, total = 0, self.width * self.height
+        while index < total:
+            run = self._read_varint()
+            state, length = run & 3, run >> 2
+            if length == 0 or index + length > total or state > OBSTACLE:
+                raise CleaningRobotError("corrupted map stream")
+            if state != EMPTY:
+                for i in range(index, index + length):
+                    yield self.min_x + i % width, self.min_y + i // width, state
+            index += length
+
+    def _delta_cells(self):
+        x = y = 0
+        for _ in range(self.count):
+            head = self._read_varint()
+            x += _unzigzag(head >> 2)
+            y += _unzigzag(self._read_varint())
+            if head & 3 > OBSTACLE:
+                raise CleaningRobotError("corrupted map stream")
+            yield x, y, head & 3
+
+
+def apply_map(chunks, cleaned: set, obstacles: set) -> int:
+    """
+    Apply a snapshot or a delta stream to the given coverage and obstacle sets.
+    The whole stream is decoded first: a truncated or corrupted stream raises
+    CleaningRobotError and leaves the sets untouched.
+    :return: the sequence number the sets are now synchronised to
+    """
+    reader = MapReader(chunks)
+    if reader.kind == SNAPSHOT:
+        new_cleaned, new_obstacles = set(), set()
+        for x, y, state in reader:
+            if state == CLEANED:
+                new_cleaned.add((x, y))
+            else:
+                new_obstacles.add((x, y))
+        cleaned.clear()
+        cleaned |= new_cleaned
+        obstacles.clear()
+        obstacles |= new_obstacles
+        return reader.seq
+
+    changes = list(reader)
+    for x, y, state in changes:
+        cell = (x, y)
+        if state == CLEANED:
+            cleaned.add(cell)
+            obstacles.discard(cell)
+        elif state == OBSTACLE:
+            obstacles.add(cell)
+            cleaned.discard(cell)
+        else:
+            cleaned.discard(cell)
+            obstacles.discard(cell)
+    return reader.seq
+
+
+class MapJournal:
+    """
+    Sequence-numbered log of map changes used to send delta updates.
+    Only the last `capacity` changes are kept; older syncs need a snapshot.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.seq = 0
+        self._changes = deque(maxlen=capacity)
+
+    def record(self, x: int, y: int, state: int) -> int:
+        self.seq += 1
+        self._changes.append((x, y, state))
+        return self.seq
+
+    def cleaned(self, x: int, y: int) -> int:
+        return self.record(x, y, CLEANED)
+
+    def obstacle(self, x: int, y: int) -> int:
+        return self.record(x, y, OBSTACLE)
+
+    def snapshot(self, cleaned, obstacles):
+        return encode_map(cleaned, obstacles, self.seq)
+
+    def encode_delta(self, since: int):
+        """
+        Encode the changes recorded after sequence number `since`
+        :return: a generator of bytes chunks
+        """
+        first_seq = self.seq - len(self._changes) + 1
+        if since > self.seq or since < first_seq - 1:
+            raise CleaningRobotError("delta not available, a snapshot is needed")
+        start = since - first_seq + 1
+        count = self.seq - since
+        yield MAGIC + bytes((VERSION, DELTA)) + _varint(since) + _varint(self.seq) + _varint(count)
+        prev_x = prev_y = 0
+        chunk = bytearray()
+        for x, y, state in islice(self._changes, start, None):
+            chunk += _varint(_zigzag(x - prev_x) << 2 | state)
+            chunk += _varint(_zigzag(y - prev_y))
+            prev_x, prev_y = x, y
+            if len(chunk) >= 1024:
+                yield bytes(chunk)
+                chunk = bytearray()
+        if chunk:
+            yield bytes(chunk)
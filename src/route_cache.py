@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict, deque
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+
+
+def plan_route(free_cells, start, goal):
+    """
+    Shortest route between two cells moving only through known free cells
+    :return: the list of cells from start to goal, or None if goal is unreachable
+    """
+    start, goal = tuple(start), tuple(goal)
+    if start == goal:
+        return [start]
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        x, y = cell
+        for dx, dy in CleaningRobot.DELTAS:
+            neighbour = (x + dx, y + dy)
+            if neighbour in parents or neighbour not in free_cells:
+                continue
+            parents[neighbour] = cell
+            if neighbour == goal:
+                route = []
+                while neighbour is not None:
+                    route.append(neighbour)
+                    neighbour = parents[neighbour]
+                route.reverse()
+                return route
+            queue.append(neighbour)
+    return None
+
+
+def distance(a, b) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def layout_fingerprint(free_cells, blocked_cells) -> str:
+    """
+    Hash of a room layout, i.e. of its known free and blocked cells, used as the layout part of the cache keys
+    """
+    data = json.dumps([sorted(free_cells), sorted(blocked_cells)])
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+class RouteCache:
+    """
+    LRU cache of planned routes and cleaning plans, persisted to disk between
+    cleaning sessions.
+    Entries are keyed by a hash of the layout fingerprint, start and goal
+    (cleaning plans by the start pose, heading included); the obstacle map
+    is tracked per entry so that an obstacle change only
+    invalidates the routes it can affect, and route() checks a cached route
+    against the current free cells before reusing it.
+    """
+
+    def __init__(self, capacity: int = 256, path: str = None):
+        if capacity <= 0:
+            raise CleaningRobotError("route cache capacity must be positive")
+        self.capacity = capacity
+        self.path = path
+        self.obstacles = set()
+        self._entries = OrderedDict()  # key -> (start, goal, route, blocked); goal is None for cleaning plans
+        self._by_cell = {}  # cell -> keys of the routes crossing it
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(layout, start, goal) -> str:
+        data = json.dumps([layout, list(start), None if goal is None else list(goal)])
+        return hashlib.sha1(data.encode()).hexdigest()
+
+    def get(self, layout, start, goal):
+        key = self.key(layout, start, goal)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return list(entry[2])
+
+    def put(self, layout, start, goal, route) -> None:
+        key = self.key(layout, start, goal)
+        if key in self._entries:
+            self._remove(key)
+        self._add(key, tuple(start), tuple(goal), [tuple(cell) for cell in route], ())
+        self._evict()
+
+    def get_plan(self, layout, start):
+        """
+        :param layout: layout_fingerprint() of the room
+        :param start: start pose (x, y, heading)
+        :return: (route, blocked cells) of the cleaning plan stored for this layout and start, or None
+        """
+        key = self.key(layout, start, None)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return list(entry[2]), set(entry[3])
+
+    def put_plan(self, layout, start, route, blocked) -> None:
+        """
+        Store the sequence of cells visited to clean a room, with the blocked
+        cells found along the way, so the next session can replay it
+        """
+        key = self.key(layout, start, None)
+        if key in self._entries:
+            self._remove(key)
+        self._add(key, tuple(start), None, [tuple(cell) for cell in route], tuple(tuple(cell) for cell in blocked))
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.capacity:
+            self._remove(next(iter(self._entries)))
+
+    def _add(self, key, start, goal, route, blocked) -> None:
+        self._entries[key] = (start, goal, route, blocked)
+        for cell in route:
+            self._by_cell.setdefault(cell, set()).add(key)
+
+    def _remove(self, key) -> None:
+        _, _, route, _ = self._entries.pop(key)
+        # Cleaning plans may cross the same cell several times
+        for cell in set(route):
+            keys = self._by_cell[cell]
+            keys.discard(key)
+            if not keys:
+                del self._by_cell[cell]
+
+    def route(self, layout, free_cells, start, goal):
+        """
+        Return the cached route or plan it and cache it.
+        A cached route is only reused if every cell it crosses is still in
+        free_cells, otherwise it is dropped and planned again.
+        """
+        route = self.get(layout, start, goal)
+        if route is not None and not all(cell in free_cells for cell in route):
+            self.hits -= 1
+            self.misses += 1
+            self._remove(self.key(layout, start, goal))
+            route = None
+        if route is None:
+            route = plan_route(free_cells, start, goal)
+            if route is not None:
+                self.put(layout, start, goal, route)
+        return route
+
+    def obstacle_added(self, cell) -> int:
+        """
+        Drop the routes crossing a newly blocked cell
+        :return: the number of invalidated routes
+        """
+        cell = tuple(cell)
+        self.obstacles.add(cell)
+        keys = list(self._by_cell.get(cell, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def obstacle_removed(self, cell) -> int:
+        """
+        Drop the routes that could become shorter by passing through a freed
+        cell, and the cleaning plans that assumed the cell was blocked
+        :return: the number of invalidated routes
+        """
+        cell = tuple(cell)
+        self.obstacles.discard(cell)
+        stale = [key for key, (start, goal, route, blocked) in self._entries.items()
+                 if (cell in blocked if goal is None
+                     else distance(start, cell) + distance(cell, goal) < len(route) - 1)]
+        for key in stale:
+            self._remove(key)
+        return len(stale)
+
+    def sync_obstacles(self, obstacles) -> int:
+        """
+        Reconcile the cache with the current obstacle map, e.g. at startup
+        :return: the number of invalidated routes
+        """
+        obstacles = {tuple(cell) for cell in obstacles}
+        invalidated = 0
+        for cell in obstacles - self.obstacles:
+            invalidated += self.obstacle_added(cell)
+        for cell in self.obstacles - obstacles:
+            invalidated += self.obstacle_removed(cell)
+        return invalidated
+
+    def save(self) -> None:
+        if self.path is None:
+            raise CleaningRobotError("route cache has no file")
+        data = {
+            "obstacles": sorted(self.obstacles),
+            "entries": [[key, start, goal, route, blocked]
+                        for key, (start, goal, route, blocked) in self._entries.items()],
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except (OSError, ValueError) as error:
+            raise CleaningRobotError(f"cannot load route cache: {error}")
+        try:
+            obstacles = {tuple(cell) for cell in data["obstacles"]}
+            # Entries are stored from least to most recently used
+            entries = [(key, tuple(start), None if goal is None else tuple(goal), [tuple(cell) for cell in route],
+                        tuple(tuple(cell) for cell in blocked))
+                       for key, start, goal, route, blocked in data["entries"][-self.capacity:]]
+        except (KeyError, TypeError, ValueError) as error:
+            raise CleaningRobotError(f"cannot load route cache: malformed data ({error!r})")
+        self._entries.clear()
+        self._by_cell.clear()
+        self.obstacles = obstacles
+        for entry in entries:
+            self._add(*entry)
@@ -0,0 +1,226 @@
+import heapq
+import itertools
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+
+
+class Simulator:
+    """
+    Discrete-event clock: actions are kept in a priority queue ordered by
+    their simulated time and executed without ever sleeping
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self._queue = []
+        self._seq = itertools.count()
+
+    def schedule(self, delay: float, action, *args) -> None:
+        if delay < 0:
+            raise CleaningRobotError("cannot schedule an event in the past")
+        # The sequence number keeps events at the same time in FIFO order
+        heapq.heappush(self._queue, (self.now + delay, next(self._seq), action, args))
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def run(self, until: float = None) -> int:
+        """
+        Execute events in time order
+        :param until: stop before the first event scheduled after this time
+        :return: the number of events executed
+        """
+        executed = 0
+        queue = self._queue
+        while queue:
+            if until is not None and queue[0][0] > until:
+                self.now = until
+                break
+            self.now, _, action, args = heapq.heappop(queue)
+            action(*args)
+            executed += 1
+        return executed
+
+
+class SimulatedRoom:
+    """
+    Rectangular room shared by several robots: a cell is blocked if it is
+    outside the room, contains an obstacle or is occupied by another robot
+    """
+
+    def __init__(self, length: int, width: int, obstacles=()):
+        if length <= 0 or width <= 0:
+            raise CleaningRobotError("room size must be positive")
+        self.length = length
+        self.width = width
+        self.obstacles = set(obstacles)
+        self.occupied = {}
+
+    def is_blocked(self, x: int, y: int, robot=None) -> bool:
+        if x < 0 or y < 0 or x >= self.width or y >= self.length:
+            return True
+        if (x, y) in self.obstacles:
+            return True
+        occupant = self.occupied.get((x, y))
+        return occupant is not None and occupant is not robot
+
+    def free_cells(self) -> set:
+        return {(x, y) for x in range(self.width) for y in range(self.length)} - self.obstacles
+
+
+class SimulatedBattery:
+    """
+    Battery model that replaces the IBS: the charge drains with the simulated
+    time and with every motor pulse
+    """
+
+    def __init__(self, simulator: Simulator, charge: float = 100.0, idle_drain: float = 0.001,
+                 pulse_drain: float = 0.001):
+        self.simulator = simulator
+        self.initial_charge = charge
+        self.idle_drain = idle_drain  # percent per second
+        self.pulse_drain = pulse_drain  # percent per motor pulse
+        self.pulses = 0
+
+    def get_charge_left(self) -> int:
+        charge = self.initial_charge - self.idle_drain * self.simulator.now - self.pulse_drain * self.pulses
+        return max(0, int(charge))
+
+
+class SimulatedRobot(CleaningRobot):
+    """
+    CleaningRobot whose motors, infrared sensor and IBS are driven by a Simulator.
+    Motor pulses are not executed on the GPIO: the simulator accounts for their duration.
+    A command received from the RMS is executed when it arrives, but its pose
+    change and reply are committed by a completion event at the end of the
+    pulse; meanwhile the robot holds both its cell and the cells it moves to.
+    With smooth_motion, consecutive "f" messages are executed as one forward
+    run and every cell is committed when the robot enters it.
+    """
+
+    RMS_LATENCY = 0.05  # seconds between a reply and the next RMS message
+
+    def __init__(self, simulator: Simulator, room: SimulatedRoom, x: int = 0, y: int = 0, heading: str = "N",
+                 battery: SimulatedBattery = None):
+        if room.is_blocked(x, y):
+            raise CleaningRobotError("robot placed on a blocked cell")
+        super().__init__()
+        self.simulator = simulator
+        self.room = room
+        self.ibs = battery if battery is not None else SimulatedBattery(simulator)
+        self.pos_x = x
+        self.pos_y = y
+        self.heading = heading
+        self.cleaned_positions = {(x, y)}
+        self.room_length = room.length
+        self.room_width = room.width
+        self.room_cells = room.free_cells()
+        self.motion_time = 0.0  # seconds of motor pulses started by the command being executed
+        self._path = None  # (motion time, cell) entered by the command received from the RMS
+        self.replies = []
+        self.telemetry = []
+        room.occupied[(x, y)] = self
+
+    def obstacle_found(self) -> bool:
+        dx, dy = self.DELTAS[self.heading_index]
+        return self.room.is_blocked(self.pos_x + dx, self.pos_y + dy, self)
+
+    def activate_wheel_motor(self) -> None:
+        self._pulse()
+
+    def advance(self, dx: int, dy: int) -> None:
+        occupied = self.room.occupied
+        del occupied[(self.pos_x, self.pos_y)]
+        cell = (self.pos_x + dx, self.pos_y + dy)
+        occupied[cell] = self
+        if self._path is not None:
+            self._path.append((self.motion_time, cell))
+        super().advance(dx, dy)
+
+    def start_wheel_run(self) -> None:
+        self.motion_time += self.RAMP_STEPS * self.RAMP_STEP_TIME
+
+    def drive_cell(self, duration: float) -> None:
+        self.ibs.pulses += 1
+        self.motion_time += duration
+
+    def stop_wheel_run(self, ramp: bool = True) -> None:
+        if ramp:
+            self.motion_time += self.RAMP_STEPS * self.RAMP_STEP_TIME
+
+    def activate_rotation_motor(self, direction) -> None:
+        self._pulse()
+
+    def _pulse(self) -> None:
+        self.ibs.pulses += 1
+        self.motion_time += self.MOTOR_PULSE
+
+    def send_commands(self, commands, delay: float = 0.0) -> None:
+        """
+        Schedule a stream of RMS messages; each one is delivered once the
+        motor pulse triggered by the previous one has completed.
+        The stream ends when the robot signals that it needs to be recharged.
+        :param commands: an iterable of "f", "l" and "r" commands
+        """
+        self.simulator.schedule(delay, self._receive, iter(commands))
+
+    def _receive(self, commands, command: str = None) -> None:
+        """
+        :param command: the message already taken from the stream, if any
+        """
+        if command is None:
+            command = next(commands, None)
+        if command is None:
+            return
+        start = (self.pos_x, self.pos_y, self.heading_index)
+        self.motion_time = 0.0
+        self._path = []
+        following = None
+        if self.smooth_motion and command == self.FORWARD:
+            cells = 1
+            following = next(commands, None)
+            while following == self.FORWARD:
+                cells += 1
+                following = next(commands, None)
+            replies = self.forward_run(cells)
+        else:
+            replies = [self.execute_command(command)]
+        end = (self.pos_x, self.pos_y, self.heading_index)
+        path, self._path = self._path, None
+        if not self.motion_time:
+            self._complete(replies, end, commands, following)
+            return
+        # Until the motor reaches them the robot is still at its start pose, holding every cell on its way
+        self.pos_x, self.pos_y, self.heading_index = start
+        occupied = self.room.occupied
+        occupied[(self.pos_x, self.pos_y)] = self
+        for offset, cell in path:
+            occupied[cell] = self
+            self.simulator.schedule(offset, self._enter, cell)
+        self.simulator.schedule(self.motion_time, self._complete, replies, end, commands, following)
+
+    def _enter(self, cell) -> None:
+        del self.room.occupied[(self.pos_x, self.pos_y)]
+        self.pos_x, self.pos_y = cell
+
+    def _complete(self, replies: list, pose, commands, following: str) -> None:
+        self.pos_x, self.pos_y, self.heading_index = pose
+        for reply in replies:
+            self.replies.append((self.simulator.now, reply))
+        if self.recharge_led_on:
+            # The robot refuses to move until recharged, so the RMS stops the stream
+            return
+        self.simulator.schedule(self.RMS_LATENCY, self._receive, commands, following)
+
+    def sample_sensors(self, period: float, until: float) -> None:
+        """
+        Periodically record (time, charge left, cleaned percentage) in telemetry
+        """
+        if period <= 0:
+            raise CleaningRobotError("sampling period must be positive")
+        self.simulator.schedule(0.0, self._sample, period, until)
+
+    def _sample(self, period: float, until: float) -> None:
+        self.telemetry.append((self.simulator.now, self.check_battery(), self.cleaned_percentage()))
+        if self.simulator.now + period <= until:
+            self.simulator.schedule(period, self._sample, period, until)
@@ -320,7 +320,116 @@ class TestCleaningRobot(TestCase):
         self.cr.return_to_start()
         self.assertEqual(self.cr.robot_status(), "(0,0,N)")
 
+    def test_motion_tables_match_rotation_dicts(self):
+        for i, h in enumerate(CleaningRobot.HEADINGS):
+            self.assertEqual(CleaningRobot.HEADINGS[CleaningRobot.TURN_LEFT[i]], CleaningRobot.ROTATIONS_LEFT[h])
+            self.assertEqual(CleaningRobot.HEADINGS[CleaningRobot.TURN_RIGHT[i]], CleaningRobot.ROTATIONS_RIGHT[h])
+            self.assertEqual(CleaningRobot.DELTAS[i], CleaningRobot.DIRECTIONS[h])
 
+    def test_robot_status_after_direct_pose_change(self):
+        self.cr.initialize_robot()
+        self.assertEqual(self.cr.robot_status(), "(0,0,N)")
+        self.cr.pos_x = 2
+        self.cr.heading = CleaningRobot.W
+        self.assertEqual(self.cr.robot_status(), "(2,0,W)")
+
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(CleaningRobot, "check_battery", return_value=11)
+    @patch.object(CleaningRobot, "obstacle_found", return_value=True)
+    def test_obstacle_found_facing_east(self, mock_obstacle_found, mock_check_battery, mock_rotation_motor):
+        self.cr.initialize_robot()
+        self.cr.execute_command("r")
+        self.assertEqual(self.cr.execute_command("f"), "(0,0,E)(0,1)")
+        self.assertEqual(self.cr.obstacle_positions, {(1, 0)})
+
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(CleaningRobot, "check_battery", return_value=50)
+    @patch.object(CleaningRobot, "obstacle_found", return_value=False)
+    def test_execute_commands_without_smooth_motion(self, mock_obstacle_found, mock_check_battery, mock_wheel_motor,
+                                                    mock_rotation_motor):
+        self.cr.initialize_robot()
+        self.assertEqual(self.cr.execute_commands("ffr"), ["(0,1,N)", "(0,2,N)", "(0,2,E)"])
+        self.assertEqual(mock_wheel_motor.call_count, 2)
+
+    @patch.object(CleaningRobot, "stop_wheel_run")
+    @patch.object(CleaningRobot, "start_wheel_run")
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(CleaningRobot, "check_battery", return_value=50)
+    @patch.object(CleaningRobot, "obstacle_found", return_value=False)
+    def test_smooth_motion_merges_forward_commands(self, mock_obstacle_found, mock_check_battery, mock_wheel_motor,
+                                                   mock_rotation_motor, mock_start_run, mock_stop_run):
+        self.cr.initialize_robot()
+        self.cr.smooth_motion = True
+        replies = self.cr.execute_commands("fffrff")
+        self.assertEqual(replies, ["(0,1,N)", "(0,2,N)", "(0,3,N)", "(0,3,E)", "(1,3,E)", "(2,3,E)"])
+        mock_wheel_motor.assert_not_called()
+        self.assertEqual(mock_start_run.call_count, 2)
+        self.assertEqual(mock_stop_run.call_count, 2)
+        self.assertEqual(self.cr.cleaned_positions, {(0, 0), (0, 1), (0, 2), (0, 3), (1, 3)})
+
+    @patch.object(CleaningRobot, "stop_wheel_run")
+    @patch.object(CleaningRobot, "start_wheel_run")
+    @patch.object(CleaningRobot, "check_battery", return_value=50)
+    @patch.object(CleaningRobot, "obstacle_found", side_effect=[False, True, True, True])
+    def test_smooth_motion_stops_at_obstacle(self, mock_obstacle_found, mock_check_battery, mock_start_run,
+                                             mock_stop_run):
+        self.cr.initialize_robot()
+        self.cr.smooth_motion = True
+        with patch.object(CleaningRobot, "drive_cell") as mock_drive_cell:
+            self.assertEqual(self.cr.forward_run(3), ["(0,1,N)", "(0,1,N)(0,2)", "(0,1,N)(0,2)"])
+        mock_start_run.assert_called_once()
+        # The blocked cell is seen on entering (0,1), so the ramp-down is part of crossing it
+        mock_stop_run.assert_called_once_with()
+        mock_drive_cell.assert_called_once_with(CleaningRobot.CELL_TIME - 5 * CleaningRobot.RAMP_STEP_TIME)
+
+    @patch.object(CleaningRobot, "check_battery", side_effect=[50, 9])
+    @patch.object(CleaningRobot, "obstacle_found", return_value=False)
+    def test_smooth_motion_stops_on_low_battery(self, mock_obstacle_found, mock_check_battery):
+        self.cr.initialize_robot()
+        self.cr.smooth_motion = True
+        self.assertEqual(self.cr.forward_run(2), ["(0,1,N)", "!(0,1,N)"])
+        self.assertEqual(self.cr.wheel_pwm.dutycycle, 0)
 
+    @patch.object(CleaningRobot, "check_battery", return_value=50)
+    @patch.object(CleaningRobot, "obstacle_found", return_value=False)
+    def test_smooth_motion_pwm_ramp(self, mock_obstacle_found, mock_check_battery):
+        self.cr.initialize_robot()
+        self.cr.smooth_motion = True
+        with patch.object(GPIO.PWM, "ChangeDutyCycle") as mock_duty_cycle:
+            self.cr.execute_commands("ff")
+        self.assertEqual(mock_duty_cycle.call_args_list, [call(20), call(40), call(60), call(80), call(100),
+                                                          call(80), call(60), call(40), call(20), call(0)])
+
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(CleaningRobot, "check_battery", return_value=11)
+    @patch.object(CleaningRobot, "obstacle_found", return_value=True)
+    def test_obstacle_found_facing_south_and_west(self, mock_obstacle_found, mock_check_battery, mock_rotation_motor):
+        self.cr.initialize_robot()
+        self.cr.pos_x, self.cr.pos_y = 1, 1
+        self.cr.execute_command("r")
+        self.cr.execute_command("r")
+        self.assertEqual(self.cr.execute_command("f"), "(1,1,S)(1,2)")
+        self.cr.execute_command("r")
+        self.assertEqual(self.cr.execute_command("f"), "(1,1,W)(1,2)")
+        self.assertEqual(self.cr.obstacle_positions, {(1, 0), (0, 1)})
 
+    def test_invalid_heading_error(self):
+        self.cr.initialize_robot()
+        with self.assertRaises(CleaningRobotError):
+            self.cr.heading = "X"
+        self.assertEqual(self.cr.heading, CleaningRobot.N)
 
+    @patch.object(CleaningRobot, "check_battery", return_value=50)
+    @patch.object(CleaningRobot, "obstacle_found", return_value=False)
+    def test_smooth_motion_ramps_are_part_of_the_first_and_last_cells(self, mock_obstacle_found, mock_check_battery):
+        self.cr.initialize_robot()
+        self.cr.smooth_motion = True
+        with patch.object(CleaningRobot, "drive_cell") as mock_drive_cell:
+            self.cr.forward_run(3)
+        durations = [args[0] for args, _ in mock_drive_cell.call_args_list]
+        self.assertAlmostEqual(durations[0], CleaningRobot.CELL_TIME - 3 * CleaningRobot.RAMP_STEP_TIME)
+        self.assertEqual(durations[1], CleaningRobot.CELL_TIME)
+        self.assertAlmostEqual(durations[2], CleaningRobot.CELL_TIME - 2 * CleaningRobot.RAMP_STEP_TIME)
+        self.assertEqual(CleaningRobot.CELL_TIME, CleaningRobot.MOTOR_PULSE)
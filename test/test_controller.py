@@ -0,0 +1,156 @@
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.controller import RobotController
+
+
+class TestRobotController(TestCase):
+
+    def setUp(self):
+        self.cr = CleaningRobot()
+        self.cr.initialize_robot()
+        patcher = patch.object(CleaningRobot, "check_battery", return_value=50)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(CleaningRobot, "obstacle_found", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    def test_commands_executed_in_order(self, mock_wheel_motor, mock_rotation_motor):
+        controller = RobotController(self.cr)
+        futures = [controller.submit(command) for command in "ffrf"]
+        controller.stop()
+        self.assertEqual([f.result() for f in futures], ["(0,1,N)", "(0,2,N)", "(0,2,E)", "(1,2,E)"])
+        self.assertEqual(controller.robot_status(), "(1,2,E)")
+        self.assertTrue(controller.snapshot().cleaning_system_on)
+
+    def test_snapshot_does_not_wait_for_motor(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_motor():
+            started.set()
+            release.wait(5)
+
+        with patch.object(CleaningRobot, "activate_wheel_motor", side_effect=slow_motor):
+            controller = RobotController(self.cr)
+            future = controller.submit("f")
+            self.assertTrue(started.wait(5))
+            self.assertEqual(controller.robot_status(), "(0,0,N)")
+            release.set()
+            self.assertEqual(future.result(5), "(0,1,N)")
+            controller.stop()
+
+    def test_queue_full_error(self):
+        release = threading.Event()
+        controller = RobotController(self.cr, max_pending=1)
+        controller.call(release.wait, 5)
+        controller.call(release.wait, 5, timeout=1)
+        with self.assertRaises(CleaningRobotError):
+            controller.call(release.wait, 5, timeout=0.01)
+        release.set()
+        controller.stop()
+
+    def test_invalid_command_error(self):
+        controller = RobotController(self.cr)
+        with self.assertRaises(ValueError):
+            controller.submit("b")
+        controller.stop()
+
+    def test_exception_is_set_on_future(self):
+        controller = RobotController(self.cr)
+        self.cr.water_level = 101
+        future = controller.call(self.cr.check_water_status)
+        with self.assertRaises(CleaningRobotError):
+            future.result(5)
+        controller.stop()
+
+    def test_submit_after_stop_error(self):
+        controller = RobotController(self.cr)
+        controller.stop()
+        with self.assertRaises(CleaningRobotError):
+            controller.submit("f")
+
+    def test_stop_honours_timeout_with_full_queue(self):
+        release = threading.Event()
+        controller = RobotController(self.cr, max_pending=1)
+        running = controller.call(release.wait, 5)
+        queued = controller.call(release.wait, 5, timeout=1)
+        start = time.monotonic()
+        controller.stop(timeout=0.2)
+        self.assertLess(time.monotonic() - start, 1)
+        release.set()
+        self.assertTrue(running.result(5))
+        self.assertTrue(queued.result(5))
+
+    def test_stop_cancel_pending(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_command():
+            started.set()
+            return release.wait(5)
+
+        controller = RobotController(self.cr)
+        running = controller.call(slow_command)
+        queued = [controller.call(release.wait, 5) for _ in range(3)]
+        self.assertTrue(started.wait(5))
+        controller.stop(timeout=0.1, cancel_pending=True)
+        release.set()
+        self.assertTrue(running.result(5))
+        for future in queued:
+            with self.assertRaises(CleaningRobotError):
+                future.result(5)
+
+    def test_stop_wakes_callers_waiting_for_room(self):
+        release = threading.Event()
+        controller = RobotController(self.cr, max_pending=1)
+        controller.call(release.wait, 5)
+        controller.call(release.wait, 5, timeout=1)
+        errors = []
+
+        def blocked_call():
+            try:
+                controller.call(release.wait, 5)
+            except CleaningRobotError as error:
+                errors.append(error)
+
+        caller = threading.Thread(target=blocked_call)
+        caller.start()
+        time.sleep(0.05)
+        controller.stop(timeout=0.1)
+        caller.join(5)
+        self.assertEqual(len(errors), 1)
+        release.set()
+
+    def test_every_accepted_future_completes_when_stopping_concurrently(self):
+        controller = RobotController(self.cr, max_pending=1000)
+        futures = []
+
+        def producer():
+            for _ in range(200):
+                try:
+                    futures.append(controller.call(int))
+                except CleaningRobotError:
+                    return
+
+        producers = [threading.Thread(target=producer) for _ in range(4)]
+        for thread in producers:
+            thread.start()
+        controller.stop()
+        for thread in producers:
+            thread.join(5)
+        for future in futures:
+            self.assertEqual(future.result(5), 0)
+
+    def test_worker_failure_stops_controller(self):
+        controller = RobotController(self.cr)
+        with patch.object(RobotController, "_take_snapshot", side_effect=RuntimeError("sensor bus")):
+            future = controller.call(int)
+            self.assertEqual(future.result(5), 0)
+            controller._worker.join(5)
+        with self.assertRaises(CleaningRobotError):
+            controller.call(int)
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+from src.cleaning_robot import CleaningRobotError
+from src.exploration import Explorer
+from src.simulator import Simulator, SimulatedRoom, SimulatedRobot, SimulatedBattery
+
+
+class TestExplorer(TestCase):
+
+    def setUp(self):
+        self.sim = Simulator()
+
+    def test_explore_empty_room(self):
+        room = SimulatedRoom(4, 5)
+        robot = SimulatedRobot(self.sim, room)
+        explorer = Explorer(robot)
+        self.assertEqual(explorer.explore(), 100)
+        self.assertEqual(explorer.bounds(), (0, 0, 4, 3))
+        self.assertEqual((robot.room_width, robot.room_length), (5, 4))
+        self.assertEqual(robot.cleaning_map(), 100)
+
+    def test_explore_finds_obstacles(self):
+        obstacles = {(1, 1), (2, 1), (3, 3)}
+        room = SimulatedRoom(5, 5, obstacles)
+        robot = SimulatedRobot(self.sim, room, 2, 2)
+        explorer = Explorer(robot)
+        explorer.explore()
+        self.assertTrue(obstacles <= explorer.blocked)
+        expected_free = {(x, y) for x in range(5) for y in range(5)} - obstacles
+        self.assertEqual(explorer.free, expected_free)
+        self.assertEqual(robot.obstacle_positions & obstacles, obstacles)
+        self.assertEqual(explorer.coverage(), 100)
+        self.assertEqual(len(robot.room_cells), 22)
+        self.assertEqual(robot.cleaning_map(), 100)
+
+    def test_unreachable_area_is_not_explored(self):
+        walls = {(2, 0), (2, 1), (2, 2)}
+        room = SimulatedRoom(3, 5, walls)
+        robot = SimulatedRobot(self.sim, room)
+        explorer = Explorer(robot)
+        explorer.explore()
+        self.assertEqual(explorer.bounds(), (0, 0, 1, 2))
+        self.assertNotIn((3, 0), explorer.free)
+
+    def test_nearest_frontier_is_adjacent_at_start(self):
+        robot = SimulatedRobot(self.sim, SimulatedRoom(3, 3), 1, 1)
+        path, target = Explorer(robot).nearest_frontier()
+        self.assertEqual(path, [(1, 1)])
+        self.assertIn(target, {(1, 2), (2, 1), (1, 0), (0, 1)})
+
+    def test_explore_command_budget(self):
+        robot = SimulatedRobot(self.sim, SimulatedRoom(10, 10))
+        explorer = Explorer(robot)
+        explorer.explore(max_commands=5)
+        self.assertTrue(explorer.frontier)
+        self.assertLessEqual(explorer.commands, 8)
+
+    def test_explore_low_battery_error(self):
+        robot = SimulatedRobot(self.sim, SimulatedRoom(3, 3), battery=SimulatedBattery(self.sim, charge=5.0))
+        with self.assertRaises(CleaningRobotError):
+            Explorer(robot).explore()
+
+    def test_robot_on_the_path_is_not_mapped_as_obstacle(self):
+        room = SimulatedRoom(4, 4)
+        robot = SimulatedRobot(self.sim, room)
+        explorer = Explorer(robot)
+        budget = 0
+        while True:
+            budget += 1
+            explorer.explore(max_commands=budget)
+            path, _ = explorer.nearest_frontier()
+            if len(path) > 2:
+                break
+        parked = path[1]
+        SimulatedRobot(self.sim, room, *parked)
+        explorer.explore()
+        self.assertIn(parked, explorer.free)
+        self.assertNotIn(parked, explorer.blocked)
+        self.assertNotIn(parked, robot.obstacle_positions)
+        self.assertLessEqual(robot.cleaning_map(), 100)
+        del room.occupied[parked]
+        self.assertEqual(explorer.explore(), 100)
+        self.assertEqual(robot.cleaning_map(), 100)
+        self.assertTrue(explorer.return_home())
+
+    def test_coverage_counts_only_known_free_cells(self):
+        robot = SimulatedRobot(self.sim, SimulatedRoom(2, 2))
+        explorer = Explorer(robot)
+        explorer.explore()
+        robot.cleaned_positions.add((5, 5))
+        explorer.blocked.add((0, 1))
+        explorer.free.discard((0, 1))
+        self.assertEqual(robot.cleaning_map(), 100)
@@ -0,0 +1,154 @@
+import random
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.map_codec import MapJournal, MapReader, encode_map, encode_cells, apply_map, CLEANED, OBSTACLE
+
+
+def one_byte_chunks(chunks):
+    for chunk in chunks:
+        for i in range(len(chunk)):
+            yield chunk[i:i + 1]
+
+
+class TestMapCodec(TestCase):
+
+    def test_snapshot_round_trip(self):
+        rnd = random.Random(7)
+        cleaned = {(rnd.randint(-20, 20), rnd.randint(-5, 30)) for _ in range(300)}
+        obstacles = {(rnd.randint(-20, 20), rnd.randint(-5, 30)) for _ in range(50)} - cleaned
+        decoded_cleaned, decoded_obstacles = set(), set()
+        seq = apply_map(encode_map(cleaned, obstacles, seq=12), decoded_cleaned, decoded_obstacles)
+        self.assertEqual(seq, 12)
+        self.assertEqual(decoded_cleaned, cleaned)
+        self.assertEqual(decoded_obstacles, obstacles)
+
+    def test_snapshot_decodes_one_byte_at_a_time(self):
+        cleaned = {(0, 0), (1, 0), (2, 0), (0, 1)}
+        obstacles = {(2, 2)}
+        reader = MapReader(one_byte_chunks(encode_map(cleaned, obstacles)))
+        self.assertEqual((reader.min_x, reader.min_y, reader.width, reader.height), (0, 0, 3, 3))
+        self.assertEqual(set(reader), {(0, 0, CLEANED), (1, 0, CLEANED), (2, 0, CLEANED), (0, 1, CLEANED),
+                                       (2, 2, OBSTACLE)})
+
+    def test_empty_snapshot(self):
+        cleaned, obstacles = {(1, 1)}, {(2, 2)}
+        apply_map(encode_map(set(), set()), cleaned, obstacles)
+        self.assertEqual((cleaned, obstacles), (set(), set()))
+
+    def test_large_floor_snapshot_is_small(self):
+        cleaned = {(x, y) for x in range(500) for y in range(500)}
+        obstacles = {(100, 100), (250, 400)}
+        cleaned -= obstacles
+        size = sum(len(chunk) for chunk in encode_map(cleaned, obstacles))
+        self.assertLess(size, 2048)
+
+    def test_delta_round_trip(self):
+        journal = MapJournal()
+        cleaned, obstacles = {(0, 0)}, set()
+        journal.cleaned(0, 0)
+        since = apply_map(journal.snapshot(cleaned, obstacles), set(), set())
+        journal.cleaned(0, 1)
+        journal.obstacle(0, 2)
+        journal.cleaned(-3, 1)
+        rms_cleaned, rms_obstacles = {(0, 0)}, set()
+        seq = apply_map(one_byte_chunks(journal.encode_delta(since)), rms_cleaned, rms_obstacles)
+        self.assertEqual(seq, 4)
+        self.assertEqual(rms_cleaned, {(0, 0), (0, 1), (-3, 1)})
+        self.assertEqual(rms_obstacles, {(0, 2)})
+
+    def test_delta_no_longer_available_error(self):
+        journal = MapJournal(capacity=2)
+        for x in range(5):
+            journal.cleaned(x, 0)
+        with self.assertRaises(CleaningRobotError):
+            list(journal.encode_delta(1))
+        self.assertEqual(len(list(MapReader(journal.encode_delta(3)))), 2)
+
+    def test_not_a_map_stream_error(self):
+        with self.assertRaises(CleaningRobotError):
+            MapReader([b"XYZ\x01\x00"])
+
+    def test_truncated_stream_error(self):
+        journal = MapJournal()
+        journal.cleaned(300, 300)
+        data = b"".join(journal.encode_delta(0))
+        with self.assertRaises(CleaningRobotError):
+            list(MapReader([data[:-1]]))
+
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(CleaningRobot, "check_battery", return_value=50)
+    def test_robot_records_map_changes(self, mock_check_battery, mock_wheel_motor):
+        robot = CleaningRobot()
+        robot.initialize_robot()
+        robot.map_journal = MapJournal()
+        with patch.object(CleaningRobot, "obstacle_found", return_value=False):
+            robot.execute_command("f")
+            robot.execute_command("f")
+        with patch.object(CleaningRobot, "obstacle_found", return_value=True):
+            robot.execute_command("f")
+            robot.execute_command("f")
+        cleaned, obstacles = {(0, 0)}, set()
+        apply_map(robot.map_journal.encode_delta(0), cleaned, obstacles)
+        self.assertEqual(cleaned, {(0, 0), (0, 1), (0, 2)})
+        self.assertEqual(obstacles, {(0, 3)})
+        self.assertEqual(robot.map_journal.seq, 3)
+
+    def test_truncated_snapshot_error_leaves_sets_untouched(self):
+        cleaned = {(x, y) for x in range(5) for y in range(5) if (x + y) % 3}
+        obstacles = {(0, 0), (4, 4)}
+        chunks = list(encode_map(cleaned, obstacles))
+        for cut in range(1, len(chunks)):
+            rms_cleaned, rms_obstacles = {(9, 9)}, {(8, 8)}
+            with self.subTest(cut=cut), self.assertRaises(CleaningRobotError):
+                apply_map(chunks[:cut], rms_cleaned, rms_obstacles)
+            self.assertEqual((rms_cleaned, rms_obstacles), ({(9, 9)}, {(8, 8)}))
+
+    def test_snapshot_with_trailing_empty_cells_is_complete(self):
+        cleaned, obstacles = set(), set()
+        reader = MapReader(encode_map({(0, 0), (3, 0)}, {(0, 2)}))
+        self.assertEqual(len(list(reader)), 3)
+        apply_map(encode_map({(0, 0)}, {(2, 2)}), cleaned, obstacles)
+        self.assertEqual((cleaned, obstacles), ({(0, 0)}, {(2, 2)}))
+
+    def test_truncated_delta_error_leaves_sets_untouched(self):
+        journal = MapJournal()
+        for x in range(10):
+            journal.cleaned(x, 0)
+        data = b"".join(journal.encode_delta(0))
+        cleaned, obstacles = {(0, 5)}, set()
+        with self.assertRaises(CleaningRobotError):
+            apply_map([data[:-3]], cleaned, obstacles)
+        self.assertEqual(cleaned, {(0, 5)})
+
+    def test_encode_cells_streams_from_a_reader(self):
+        cleaned = {(x, y) for x in range(-3, 4) for y in range(2, 6) if x != y}
+        obstacles = {(1, 1), (-3, 7)}
+        reader = MapReader(encode_map(cleaned, obstacles, seq=5))
+        copy = encode_cells(reader, reader.min_x, reader.min_y, reader.width, reader.height, reader.seq)
+        decoded_cleaned, decoded_obstacles = set(), set()
+        self.assertEqual(apply_map(copy, decoded_cleaned, decoded_obstacles), 5)
+        self.assertEqual((decoded_cleaned, decoded_obstacles), (cleaned, obstacles))
+
+    def test_encode_cells_out_of_order_error(self):
+        with self.assertRaises(CleaningRobotError):
+            list(encode_cells([(1, 0, CLEANED), (0, 0, CLEANED)], 0, 0, 2, 1))
+        with self.assertRaises(CleaningRobotError):
+            list(encode_cells([(2, 0, CLEANED)], 0, 0, 2, 1))
+
+    def test_obstacle_wins_over_cleaned_cell(self):
+        cleaned, obstacles = set(), set()
+        apply_map(encode_map({(0, 0), (1, 0)}, {(1, 0)}), cleaned, obstacles)
+        self.assertEqual((cleaned, obstacles), ({(0, 0)}, {(1, 0)}))
+
+    def test_unknown_cell_state_error(self):
+        snapshot = list(encode_cells([(0, 0, 3)], 0, 0, 1, 1))
+        journal = MapJournal()
+        journal.record(0, 0, 3)
+        delta = list(journal.encode_delta(0))
+        for chunks in (snapshot, delta):
+            cleaned, obstacles = {(5, 5)}, {(6, 6)}
+            with self.subTest(kind=chunks is snapshot), self.assertRaises(CleaningRobotError):
+                apply_map(chunks, cleaned, obstacles)
+            self.assertEqual((cleaned, obstacles), ({(5, 5)}, {(6, 6)}))
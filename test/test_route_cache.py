@@ -0,0 +1,217 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.cleaning_robot import CleaningRobotError
+from src.exploration import Explorer
+from src.route_cache import RouteCache, plan_route, layout_fingerprint
+from src.simulator import Simulator, SimulatedRoom, SimulatedRobot
+
+
+def grid(width, length, obstacles=()):
+    return {(x, y) for x in range(width) for y in range(length)} - set(obstacles)
+
+
+class TestRouteCache(TestCase):
+
+    def setUp(self):
+        self.free = grid(4, 4, {(1, 1), (1, 2)})
+        self.layout = layout_fingerprint(self.free, {(1, 1), (1, 2)})
+
+    def test_plan_route(self):
+        route = plan_route(self.free, (0, 2), (2, 2))
+        self.assertEqual(len(route), 5)
+        self.assertEqual((route[0], route[-1]), ((0, 2), (2, 2)))
+        self.assertTrue(set(route) <= self.free)
+
+    def test_plan_route_unreachable(self):
+        self.assertIsNone(plan_route({(0, 0), (2, 0)}, (0, 0), (2, 0)))
+
+    def test_route_is_cached(self):
+        cache = RouteCache()
+        first = cache.route(self.layout, self.free, (0, 2), (2, 2))
+        second = cache.route(self.layout, self.free, (0, 2), (2, 2))
+        self.assertEqual(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_stale_route_is_planned_again(self):
+        cache = RouteCache()
+        cache.route(self.layout, grid(4, 4), (0, 0), (3, 3))
+        smaller = grid(2, 2)
+        self.assertIsNone(cache.route(self.layout, smaller, (0, 0), (3, 3)))
+        self.assertEqual(len(cache), 0)
+        free = grid(4, 4, {(1, 0), (1, 1), (1, 2)})
+        route = cache.route(self.layout, free, (0, 0), (3, 3))
+        self.assertTrue(set(route) <= free)
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+
+    def test_key_depends_on_layout_and_start(self):
+        other = layout_fingerprint(grid(2, 6), ())
+        self.assertNotEqual(other, layout_fingerprint(grid(4, 4), ()))
+        self.assertEqual(self.layout, layout_fingerprint(set(self.free), [(1, 2), (1, 1)]))
+        self.assertNotEqual(RouteCache.key(self.layout, (0, 0), (1, 1)), RouteCache.key(other, (0, 0), (1, 1)))
+        self.assertNotEqual(RouteCache.key(self.layout, (0, 0), (1, 1)), RouteCache.key(self.layout, (0, 1), (1, 1)))
+        self.assertNotEqual(RouteCache.key(self.layout, (0, 0, "N"), None), RouteCache.key(self.layout, (0, 0, "E"), None))
+
+    def test_lru_eviction(self):
+        cache = RouteCache(capacity=2)
+        cache.put(self.layout, (0, 0), (0, 1), [(0, 0), (0, 1)])
+        cache.put(self.layout, (1, 0), (1, 1), [(1, 0), (1, 1)])
+        cache.get(self.layout, (0, 0), (0, 1))
+        cache.put(self.layout, (2, 0), (2, 1), [(2, 0), (2, 1)])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(self.layout, (1, 0), (1, 1)))
+        self.assertIsNotNone(cache.get(self.layout, (0, 0), (0, 1)))
+
+    def test_obstacle_added_invalidates_only_crossing_routes(self):
+        cache = RouteCache()
+        cache.put(self.layout, (0, 0), (0, 3), [(0, 0), (0, 1), (0, 2), (0, 3)])
+        cache.put(self.layout, (3, 0), (3, 3), [(3, 0), (3, 1), (3, 2), (3, 3)])
+        self.assertEqual(cache.obstacle_added((0, 2)), 1)
+        self.assertIsNone(cache.get(self.layout, (0, 0), (0, 3)))
+        self.assertIsNotNone(cache.get(self.layout, (3, 0), (3, 3)))
+
+    def test_obstacle_removed_invalidates_only_improvable_routes(self):
+        cache = RouteCache()
+        cache.route(self.layout, self.free, (0, 1), (2, 1))
+        cache.route(self.layout, self.free, (3, 0), (3, 3))
+        self.assertEqual(cache.obstacle_removed((1, 1)), 1)
+        self.assertIsNone(cache.get(self.layout, (0, 1), (2, 1)))
+        self.assertIsNotNone(cache.get(self.layout, (3, 0), (3, 3)))
+
+    def test_persistence_and_sync(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "routes.json")
+            cache = RouteCache(path=path)
+            cache.sync_obstacles({(1, 1), (1, 2)})
+            cache.route(self.layout, self.free, (0, 0), (0, 3))
+            cache.route(self.layout, self.free, (3, 0), (3, 3))
+            cache.save()
+
+            nightly = RouteCache(path=path)
+            self.assertEqual(len(nightly), 2)
+            self.assertEqual(nightly.sync_obstacles({(1, 1), (1, 2), (3, 2)}), 1)
+            self.assertIsNotNone(nightly.get(self.layout, (0, 0), (0, 3)))
+            self.assertIsNone(nightly.get(self.layout, (3, 0), (3, 3)))
+
+    def test_load_corrupted_file_error(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "routes.json")
+            with open(path, "w") as file:
+                file.write("{")
+            with self.assertRaises(CleaningRobotError):
+                RouteCache(path=path)
+
+    def test_load_malformed_data_error(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "routes.json")
+            for data in ("{}", "[]", '{"obstacles": []}', '{"obstacles": [], "entries": [["k", [0, 0]]]}',
+                         '{"obstacles": 1, "entries": []}'):
+                with open(path, "w") as file:
+                    file.write(data)
+                with self.subTest(data=data), self.assertRaises(CleaningRobotError):
+                    RouteCache(path=path)
+
+    def test_explorer_reuses_cached_route_home(self):
+        cache = RouteCache()
+        layout = None
+        for _ in range(2):
+            robot = SimulatedRobot(Simulator(), SimulatedRoom(4, 4, {(1, 1), (2, 1)}))
+            explorer = Explorer(robot, route_cache=cache, layout=layout)
+            explorer.explore()
+            self.assertTrue(explorer.return_home())
+            self.assertEqual((robot.pos_x, robot.pos_y), (0, 0))
+            layout = (explorer.free, explorer.blocked)
+        # Second night: one hit for the cleaning plan and one for the route home
+        self.assertEqual(cache.hits, 2)
+
+    def test_explorer_replays_cached_cleaning_plan(self):
+        cache = RouteCache()
+        obstacles = {(1, 1), (2, 1), (3, 3)}
+        first = SimulatedRobot(Simulator(), SimulatedRoom(5, 5, obstacles))
+        first_explorer = Explorer(first, route_cache=cache)
+        first_explorer.explore()
+
+        second = SimulatedRobot(Simulator(), SimulatedRoom(5, 5, obstacles))
+        second_explorer = Explorer(second, route_cache=cache, layout=(first_explorer.free, first_explorer.blocked))
+        with patch.object(Explorer, "nearest_frontier") as mock_nearest_frontier:
+            self.assertEqual(second_explorer.explore(), 100)
+        mock_nearest_frontier.assert_not_called()
+        self.assertEqual(second_explorer.free, first_explorer.free)
+        self.assertEqual(second_explorer.blocked, first_explorer.blocked)
+        self.assertLessEqual(second_explorer.commands, first_explorer.commands)
+        self.assertEqual(second.cleaning_map(), 100)
+
+    def test_cleaning_plan_of_another_layout_is_not_replayed(self):
+        cache = RouteCache()
+        first = Explorer(SimulatedRobot(Simulator(), SimulatedRoom(4, 4)), route_cache=cache)
+        first.explore()
+        other = Explorer(SimulatedRobot(Simulator(), SimulatedRoom(6, 2)), route_cache=cache)
+        self.assertEqual(other.explore(), 100)
+        self.assertEqual(other.free, grid(2, 6))
+        self.assertEqual(cache.hits, 0)
+        # Even when told the wrong layout the plan is checked cell by cell
+        robot = SimulatedRobot(Simulator(), SimulatedRoom(6, 2))
+        wrong = Explorer(robot, route_cache=cache, layout=(first.free, first.blocked))
+        self.assertEqual(wrong.explore(), 100)
+        self.assertEqual(wrong.free, grid(2, 6))
+        self.assertEqual(robot.cleaning_map(), 100)
+
+    def test_cleaning_plan_is_not_replayed_from_another_heading(self):
+        cache = RouteCache()
+        first = Explorer(SimulatedRobot(Simulator(), SimulatedRoom(3, 3)), route_cache=cache)
+        first.explore()
+        robot = SimulatedRobot(Simulator(), SimulatedRoom(3, 3), heading="E")
+        Explorer(robot, route_cache=cache, layout=(first.free, first.blocked)).explore()
+        self.assertEqual(cache.hits, 0)
+
+    def test_removed_obstacle_is_probed_and_cleaned(self):
+        cache = RouteCache()
+        first = Explorer(SimulatedRobot(Simulator(), SimulatedRoom(4, 4, {(1, 1), (2, 2)})), route_cache=cache)
+        first.explore()
+
+        robot = SimulatedRobot(Simulator(), SimulatedRoom(4, 4, {(2, 2)}))
+        second = Explorer(robot, route_cache=cache, layout=(first.free, first.blocked))
+        self.assertEqual(second.explore(), 100)
+        self.assertIn((1, 1), second.free)
+        self.assertIn((1, 1), robot.cleaned_positions)
+        self.assertEqual(robot.cleaning_map(), 100)
+        plan = cache.get_plan(layout_fingerprint(second.free, second.blocked), (0, 0, "N"))
+        self.assertNotIn((1, 1), plan[1])
+        self.assertIsNone(cache.get_plan(layout_fingerprint(first.free, first.blocked), (0, 0, "N")))
+
+    def test_blocked_cleaning_plan_falls_back_to_exploration(self):
+        cache = RouteCache()
+        room = SimulatedRoom(4, 4, {(1, 1)})
+        first = Explorer(SimulatedRobot(Simulator(), room), route_cache=cache)
+        first.explore()
+        layout = (first.free, first.blocked)
+        plan, _ = cache.get_plan(layout_fingerprint(*layout), (0, 0, "N"))
+        new_obstacle = plan[len(plan) // 2]
+
+        room = SimulatedRoom(4, 4, {(1, 1), new_obstacle})
+        robot = SimulatedRobot(Simulator(), room)
+        explorer = Explorer(robot, route_cache=cache, layout=layout)
+        explorer.explore()
+        self.assertIn(new_obstacle, explorer.blocked)
+        self.assertEqual(explorer.free, grid(4, 4, {(1, 1), new_obstacle}) & explorer.free)
+        plan, _ = cache.get_plan(layout_fingerprint(explorer.free, explorer.blocked), (0, 0, "N"))
+        self.assertNotIn(new_obstacle, plan)
+
+    def test_freed_cell_invalidates_cleaning_plan(self):
+        cache = RouteCache()
+        cache.put_plan(self.layout, (0, 0, "N"), [(0, 0), (0, 1), (0, 0)], {(1, 0), (1, 1)})
+        cache.put(self.layout, (0, 0), (0, 1), [(0, 0), (0, 1)])
+        self.assertEqual(cache.obstacle_removed((1, 1)), 1)
+        self.assertIsNone(cache.get_plan(self.layout, (0, 0, "N")))
+        self.assertIsNotNone(cache.get(self.layout, (0, 0), (0, 1)))
+
+    def test_cleaning_plan_is_persisted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "routes.json")
+            cache = RouteCache(path=path)
+            cache.put_plan(self.layout, (0, 0, "N"), [(0, 0), (0, 1), (0, 0)], {(1, 0)})
+            cache.save()
+            self.assertEqual(RouteCache(path=path).get_plan(self.layout, (0, 0, "N")),
+                             ([(0, 0), (0, 1), (0, 0)], {(1, 0)}))
@@ -0,0 +1,131 @@
+from unittest import TestCase
+
+from src.cleaning_robot import CleaningRobotError
+from src.simulator import Simulator, SimulatedRoom, SimulatedRobot, SimulatedBattery
+
+
+class TestSimulator(TestCase):
+
+    def setUp(self):
+        self.sim = Simulator()
+        self.room = SimulatedRoom(3, 3)
+
+    def test_events_run_in_time_order(self):
+        order = []
+        self.sim.schedule(2.0, order.append, "b")
+        self.sim.schedule(1.0, order.append, "a")
+        self.sim.schedule(2.0, order.append, "c")
+        self.assertEqual(self.sim.run(), 3)
+        self.assertEqual(order, ["a", "b", "c"])
+        self.assertEqual(self.sim.now, 2.0)
+
+    def test_run_until(self):
+        order = []
+        self.sim.schedule(1.0, order.append, "a")
+        self.sim.schedule(5.0, order.append, "b")
+        self.sim.run(until=3.0)
+        self.assertEqual(order, ["a"])
+        self.assertEqual(self.sim.now, 3.0)
+        self.assertEqual(self.sim.pending(), 1)
+
+    def test_schedule_in_the_past_error(self):
+        with self.assertRaises(CleaningRobotError):
+            self.sim.schedule(-1.0, print)
+
+    def test_commands_wait_for_motor_pulse(self):
+        robot = SimulatedRobot(self.sim, self.room)
+        robot.send_commands("ffr")
+        self.sim.run()
+        self.assertEqual(robot.robot_status(), "(0,2,E)")
+        times = [t for t, _ in robot.replies]
+        self.assertAlmostEqual(times[1] - times[0], SimulatedRobot.MOTOR_PULSE + SimulatedRobot.RMS_LATENCY)
+
+    def test_wall_is_an_obstacle(self):
+        robot = SimulatedRobot(self.sim, self.room)
+        robot.send_commands("ffff")
+        self.sim.run()
+        self.assertEqual(robot.replies[-1][1], "(0,2,N)(0,3)")
+
+    def test_robots_block_each_other(self):
+        first = SimulatedRobot(self.sim, self.room, 0, 0)
+        SimulatedRobot(self.sim, self.room, 0, 1)
+        first.send_commands("f")
+        self.sim.run()
+        self.assertEqual(first.replies[0][1], "(0,0,N)(0,1)")
+
+    def test_robot_on_blocked_cell_error(self):
+        SimulatedRobot(self.sim, self.room, 1, 1)
+        with self.assertRaises(CleaningRobotError):
+            SimulatedRobot(self.sim, self.room, 1, 1)
+
+    def test_robot_invalid_heading_error(self):
+        with self.assertRaises(CleaningRobotError):
+            SimulatedRobot(self.sim, self.room, heading="X")
+        self.assertEqual(self.room.occupied, {})
+
+    def test_battery_drains_over_time(self):
+        battery = SimulatedBattery(self.sim, charge=50.0, idle_drain=0.01, pulse_drain=0.0)
+        robot = SimulatedRobot(self.sim, self.room, battery=battery)
+        robot.sample_sensors(600.0, 3600.0)
+        self.sim.run()
+        self.assertEqual([charge for _, charge, _ in robot.telemetry], [50, 44, 38, 32, 26, 20, 14])
+
+    def test_low_battery_stops_command_stream(self):
+        battery = SimulatedBattery(self.sim, charge=10.0)
+        robot = SimulatedRobot(self.sim, self.room, battery=battery)
+        robot.send_commands("fff")
+        self.sim.run()
+        self.assertEqual(robot.replies, [(0.0, "!(0,0,N)")])
+
+    def test_move_is_committed_when_the_pulse_completes(self):
+        robot = SimulatedRobot(self.sim, self.room)
+        robot.send_commands("f")
+        self.sim.run(until=SimulatedRobot.MOTOR_PULSE / 2)
+        self.assertEqual(robot.robot_status(), "(0,0,N)")
+        self.assertEqual(robot.replies, [])
+        self.assertTrue(self.room.is_blocked(0, 0) and self.room.is_blocked(0, 1))
+        self.sim.run()
+        self.assertEqual(robot.replies, [(SimulatedRobot.MOTOR_PULSE, "(0,1,N)")])
+        self.assertEqual(self.room.occupied, {(0, 1): robot})
+
+    def test_other_robot_sees_the_move_at_completion(self):
+        first = SimulatedRobot(self.sim, self.room, 0, 0)
+        second = SimulatedRobot(self.sim, self.room, 1, 1, heading="W")
+        first.send_commands("fr")
+        second.send_commands("f", delay=SimulatedRobot.MOTOR_PULSE / 2)
+        self.sim.run()
+        self.assertEqual(second.replies[0][1], "(1,1,W)(1,2)")
+        self.assertIn((0, 1), second.obstacle_positions)
+
+    def test_coverage_reaches_100_in_a_furnished_room(self):
+        room = SimulatedRoom(2, 2, {(1, 1)})
+        robot = SimulatedRobot(self.sim, room)
+        robot.send_commands("frrflfl")
+        robot.sample_sensors(20.0, 20.0)
+        self.sim.run()
+        self.assertEqual(robot.telemetry[-1][2], 100)
+
+    def test_smooth_motion_moves_the_robot_in_the_room(self):
+        room = SimulatedRoom(4, 3)
+        robot = SimulatedRobot(self.sim, room)
+        robot.smooth_motion = True
+        self.assertEqual(robot.execute_commands("ff"), ["(0,1,N)", "(0,2,N)"])
+        self.assertEqual(room.occupied, {(0, 2): robot})
+        self.assertEqual(robot.ibs.pulses, 2)
+        self.assertEqual(robot.execute_command("f"), "(0,3,N)")
+        self.assertEqual(robot.execute_commands("ff"), ["(0,3,N)(0,4)", "(0,3,N)(0,4)"])
+
+    def test_smooth_motion_commits_every_cell_of_a_run(self):
+        robot = SimulatedRobot(self.sim, self.room)
+        robot.smooth_motion = True
+        robot.send_commands("fffr")
+        ramp = SimulatedRobot.RAMP_STEPS * SimulatedRobot.RAMP_STEP_TIME
+        self.sim.run(until=ramp + 0.01)
+        self.assertEqual(robot.robot_status(), "(0,1,N)")
+        self.assertEqual(robot.replies, [])
+        self.assertTrue(self.room.is_blocked(0, 2))
+        self.sim.run()
+        run_time = 2 * SimulatedRobot.CELL_TIME + ramp
+        self.assertEqual([reply for _, reply in robot.replies], ["(0,1,N)", "(0,2,N)", "(0,2,N)(0,3)", "(0,2,E)"])
+        self.assertAlmostEqual(robot.replies[0][0], run_time)
+        self.assertEqual(self.room.occupied, {(0, 2): robot})
@@ -0,0 +1,118 @@
+import os
+import random
+import re
+from unittest import TestCase
+
+from src.cleaning_robot import CleaningRobot
+
+# Total number of commands run by the soak test, raise it in CI for long runs
+# (e.g. CLEANING_ROBOT_SOAK_STEPS=2000000)
+SOAK_STEPS = int(os.getenv("CLEANING_ROBOT_SOAK_STEPS", "20000"))
+SOAK_SEEDS = int(os.getenv("CLEANING_ROBOT_SOAK_SEEDS", "20"))
+
+REPLY = re.compile(r"^!?\((-?\d+),(-?\d+),([NESW])\)(\((-?\d+),(-?\d+)\))?$")
+
+
+class SoakRobot(CleaningRobot):
+    """
+    CleaningRobot whose infrared sensor and IBS replay a generated room layout
+    and battery trace, while the motors still go through the mock GPIO
+    """
+
+    def __init__(self, rnd: random.Random, width: int, length: int, obstacles: set):
+        super().__init__()
+        self.rnd = rnd
+        self.width = width
+        self.length = length
+        self.obstacles = obstacles
+        self.charge = rnd.randint(0, 100)
+
+    def obstacle_found(self) -> bool:
+        dx, dy = self.DELTAS[self.heading_index]
+        x, y = self.pos_x + dx, self.pos_y + dy
+        return x < 0 or y < 0 or x >= self.width or y >= self.length or (x, y) in self.obstacles
+
+    def check_battery(self) -> int:
+        # Random walk that regularly crosses the recharge threshold
+        self.charge = min(100, max(0, self.charge + self.rnd.randint(-3, 3)))
+        return self.charge
+
+
+class TestSoak(TestCase):
+
+    def _random_room(self, rnd: random.Random):
+        width, length = rnd.randint(1, 8), rnd.randint(1, 8)
+        density = rnd.random() * 0.4
+        obstacles = {(x, y) for x in range(width) for y in range(length) if rnd.random() < density}
+        obstacles.discard((0, 0))
+        return width, length, obstacles
+
+    def _soak(self, seed: int, steps: int, explored: bool = False) -> None:
+        """
+        :param explored: count coverage over the known free cells (room_cells), and from time to
+            time drop a cleaned cell from them as if it had been found blocked since
+        """
+        rnd = random.Random(seed)
+        width, length, obstacles = self._random_room(rnd)
+        robot = SoakRobot(rnd, width, length, obstacles)
+        robot.initialize_robot()
+        robot.room_width = width
+        robot.room_length = length
+        if explored:
+            robot.room_cells = {(x, y) for x in range(width) for y in range(length)} - obstacles
+        coverage = 0.0
+        commands = rnd.choice(("ffffflr", "flr", "fffffffffr"))
+
+        for step in range(steps):
+            where = f"seed={seed} step={step}"
+            before = (robot.pos_x, robot.pos_y, robot.heading)
+            known_obstacles = len(robot.obstacle_positions)
+            reply = robot.execute_command(rnd.choice(commands))
+
+            match = REPLY.match(reply)
+            self.assertIsNotNone(match, f"{where}: malformed reply {reply!r}")
+            self.assertTrue(reply.lstrip("!").startswith(robot.robot_status()), f"{where}: {reply!r}")
+
+            x, y = robot.pos_x, robot.pos_y
+            self.assertIs(type(x), int, where)
+            self.assertIs(type(y), int, where)
+            self.assertTrue(0 <= x < width and 0 <= y < length, f"{where}: pose {reply} out of bounds")
+            self.assertNotIn((x, y), obstacles, where)
+            self.assertIn(robot.heading, CleaningRobot.HEADINGS, where)
+
+            self.assertNotEqual(robot.recharge_led_on, robot.cleaning_system_on,
+                                f"{where}: recharge LED and brushes both {robot.recharge_led_on}")
+            if robot.recharge_led_on:
+                self.assertEqual((x, y, robot.heading), before, f"{where}: moved with low battery")
+
+            if match.group(4):
+                self.assertEqual((int(match.group(5)), int(match.group(6))), (x, y + 1), f"{where}: {reply!r}")
+                dx, dy = CleaningRobot.DELTAS[robot.heading_index]
+                blocked = (x + dx, y + dy)
+                self.assertIn(blocked, robot.obstacle_positions, where)
+                self.assertTrue(blocked in obstacles or not (0 <= blocked[0] < width and 0 <= blocked[1] < length),
+                                f"{where}: {blocked} recorded as obstacle")
+            else:
+                self.assertEqual(len(robot.obstacle_positions), known_obstacles, where)
+
+            new_coverage = robot.cleaning_map()
+            self.assertGreaterEqual(new_coverage, coverage, where)
+            self.assertLessEqual(new_coverage, 100, where)
+            coverage = new_coverage
+
+            if explored and len(robot.room_cells) > 1 and rnd.random() < 0.001:
+                robot.room_cells.discard(rnd.choice(sorted(robot.cleaned_positions)))
+                coverage = robot.cleaning_map()
+                self.assertLessEqual(coverage, 100, where)
+
+    def test_soak_random_command_streams(self):
+        steps = max(1, SOAK_STEPS // SOAK_SEEDS)
+        for seed in range(SOAK_SEEDS):
+            with self.subTest(seed=seed):
+                self._soak(seed, steps)
+
+    def test_soak_explored_rooms(self):
+        steps = max(1, SOAK_STEPS // SOAK_SEEDS)
+        for seed in range(SOAK_SEEDS):
+            with self.subTest(seed=seed):
+                self._soak(seed, steps, explored=True)